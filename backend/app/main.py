@@ -2,7 +2,7 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from typing import List
-from .models import IngestResponse, AskRequest, AskResponse, MetricsResponse, Citation, Chunk
+from .models import IngestResponse, AskRequest, AskBatchRequest, AskResponse, MetricsResponse, Citation, Chunk
 from .settings import settings
 from .ingest import load_documents
 from .rag import RAGEngine, build_chunks_from_docs
@@ -43,28 +43,23 @@ def ingest():
     new_docs, new_chunks = engine.ingest_chunks(chunks)
     return IngestResponse(indexed_docs=new_docs, indexed_chunks=new_chunks)
 
-@app.post("/api/ask", response_model=AskResponse)
-def ask(req: AskRequest):
-    # Check if documents have been ingested
-    stats = engine.stats()
-    if stats["total_docs"] == 0:
-        return AskResponse(
-            query=req.query,
-            answer="⚠️ No documents have been ingested yet. Please use the Admin panel to 'Ingest sample docs' first, then try asking your question.",
-            citations=[],
-            chunks=[],
-            metrics={
-                "retrieval_ms": 0.0,
-                "generation_ms": 0.0,
-            }
-        )
-    
-    ctx = engine.retrieve(req.query, k=req.k or 4)
-    answer = engine.generate(req.query, ctx)
+def _no_documents_response(query: str) -> AskResponse:
+    return AskResponse(
+        query=query,
+        answer="⚠️ No documents have been ingested yet. Please use the Admin panel to 'Ingest sample docs' first, then try asking your question.",
+        citations=[],
+        chunks=[],
+        metrics={
+            "retrieval_ms": 0.0,
+            "generation_ms": 0.0,
+        }
+    )
+
+def _ask_response(query: str, answer: str, ctx: List[dict], stats: dict) -> AskResponse:
     citations = [Citation(title=c.get("title"), section=c.get("section")) for c in ctx]
     chunks = [Chunk(title=c.get("title"), section=c.get("section"), text=c.get("text")) for c in ctx]
     return AskResponse(
-        query=req.query,
+        query=query,
         answer=answer,
         citations=citations,
         chunks=chunks,
@@ -73,3 +68,22 @@ def ask(req: AskRequest):
             "generation_ms": stats["avg_generation_latency_ms"],
         }
     )
+
+@app.post("/api/ask", response_model=AskResponse)
+async def ask(req: AskRequest):
+    # Check if documents have been ingested
+    stats = engine.metrics.summary()
+    if not engine.has_documents():
+        return _no_documents_response(req.query)
+    
+    answer, ctx = await engine.answer_async(req.query, k=req.k or 4)
+    return _ask_response(req.query, answer, ctx, stats)
+
+@app.post("/api/ask_batch", response_model=List[AskResponse])
+async def ask_batch(req: AskBatchRequest):
+    stats = engine.metrics.summary()
+    if not engine.has_documents():
+        return [_no_documents_response(q) for q in req.queries]
+
+    results = await engine.answer_batch_async(req.queries, k=req.k or 4)
+    return [_ask_response(q, answer, ctx, stats) for q, (answer, ctx) in zip(req.queries, results)]
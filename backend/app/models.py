@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from typing import List, Optional, Dict, Any
 
 class IngestResponse(BaseModel):
@@ -9,6 +9,12 @@ class AskRequest(BaseModel):
     query: str
     k: int | None = 4
 
+MAX_BATCH_QUERIES = 32
+
+class AskBatchRequest(BaseModel):
+    queries: List[str] = Field(..., max_length=MAX_BATCH_QUERIES)
+    k: int | None = 4
+
 class Citation(BaseModel):
     title: str
     section: str | None = None
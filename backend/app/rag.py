@@ -1,88 +1,494 @@
-import time, os, math, json, hashlib
-from typing import List, Dict, Tuple
+import asyncio, functools, time, os, sqlite3, statistics, threading, multiprocessing
+
+# Pin BLAS/OpenMP pools before NumPy/torch load them: one intra-op pool sized
+# to the machine instead of several competing cpu_count()-sized pools.
+_CPU_COUNT = os.cpu_count() or 1
+for _var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+    os.environ.setdefault(_var, str(_CPU_COUNT))
+
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Hashable, List, Dict, Optional, Tuple
 import numpy as np
 from .settings import settings
 from .ingest import chunk_text, doc_hash
 from qdrant_client import QdrantClient, models as qm
 
+# ---- Caches ----
+class LRUCache:
+    """Thread-safe bounded mapping that evicts the least recently used entry"""
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# ---- Persistent embedding cache ----
+class EmbeddingCache:
+    """SQLite-backed map of chunk hash -> float32 embedding, survives restarts.
+
+    Rows are keyed by (model, dim, hash), so embedders with different models can
+    share one file without invalidating each other's entries.
+    """
+    _LOOKUP_BATCH = 500  # stay under SQLite's bound-parameter limit
+
+    def __init__(self, path: str, model: str, dim: int = 384):
+        self.path = path
+        self.model = model
+        self.dim = dim
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings ("
+                "model TEXT NOT NULL, dim INTEGER NOT NULL, hash TEXT NOT NULL, vec BLOB NOT NULL, "
+                "PRIMARY KEY (model, dim, hash))"
+            )
+
+    def get_many(self, hashes: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        with self._lock:
+            for i in range(0, len(hashes), self._LOOKUP_BATCH):
+                batch = hashes[i:i + self._LOOKUP_BATCH]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT hash, vec FROM embeddings WHERE model = ? AND dim = ? AND hash IN ({placeholders})",
+                    [self.model, self.dim, *batch],
+                ).fetchall()
+                for h, blob in rows:
+                    vec = np.frombuffer(blob, dtype=np.float32)
+                    if vec.shape[0] == self.dim:
+                        found[h] = vec
+        return found
+
+    def put_many(self, hashes: List[str], vectors: np.ndarray):
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (model, dim, hash, vec) VALUES (?, ?, ?, ?)",
+                [(self.model, self.dim, h, v.tobytes()) for h, v in zip(hashes, vectors)],
+            )
+
 # ---- Simple local embedder (deterministic) ----
-def _tokenize(s: str) -> List[str]:
-    return [t.lower() for t in s.split()]
+# Token hashing for the fallback embedder, vectorized over a whole batch of texts
+_POLY = 0x100000001B3  # odd, so it has an inverse mod 2**64
+_POLY_INV = pow(_POLY, -1, 2**64)
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+@functools.lru_cache(maxsize=1)
+def _word_char_table() -> np.ndarray:
+    """Per BMP code point: is it a regex \\w character?"""
+    return np.fromiter((chr(c).isalnum() or c == 0x5F for c in range(0x10000)), dtype=bool, count=0x10000)
+
+_POLY_POWERS_KEPT = 1 << 20  # covers a FALLBACK_BATCH of default-size chunks; 16 MB for both tables
+
+def _compute_poly_powers(n: int) -> Tuple[np.ndarray, np.ndarray]:
+    fwd = np.full(n, _POLY, dtype=np.uint64)
+    inv = np.full(n, _POLY_INV, dtype=np.uint64)
+    fwd[0] = inv[0] = 1
+    return np.cumprod(fwd), np.cumprod(inv)  # uint64 products wrap, i.e. mod 2**64
+
+@functools.lru_cache(maxsize=1)
+def _kept_poly_powers() -> Tuple[np.ndarray, np.ndarray]:
+    return _compute_poly_powers(_POLY_POWERS_KEPT)
+
+def _poly_powers(n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """_POLY**i and _POLY**-i (mod 2**64) for i < n, from one fixed-size table; longer runs are computed per call"""
+    if n > _POLY_POWERS_KEPT:
+        return _compute_poly_powers(n)
+    fwd, inv = _kept_poly_powers()
+    return fwd[:n], inv[:n]
+
+def _token_hashes(texts: List[str]) -> Tuple[np.ndarray, np.ndarray]:
+    """64-bit hash of every \\w+ token of the lowercased texts, and the index of the text it is in.
+
+    Same tokens as re.findall(r"\\w+", text.lower()), found with array ops over the
+    code points of the whole batch instead of a regex and a hash call per token.
+    """
+    lowered = [t.lower() for t in texts]
+    # "\0" is not a word character, so no token spans two texts
+    cp = np.frombuffer("\0".join(lowered).encode("utf-32-le"), dtype=np.uint32)
+    # Zero-padded word mask; +1/-1 steps mark where tokens start and end
+    word = np.zeros(cp.shape[0] + 2, dtype=np.int8)
+    _word_char_table().take(cp, mode="clip", out=word[1:-1].view(bool))
+    # Code points above the BMP (emoji, rare scripts) are few; classify them one by one
+    for i in (cp > 0xFFFF).nonzero()[0]:
+        word[i + 1] = chr(cp[i]).isalnum()
+    edges = word[1:] - word[:-1]
+    starts = (edges == 1).nonzero()[0]
+    ends = (edges == -1).nonzero()[0]
+    # Polynomial hash per token from one prefix sum: (S[end] - S[start]) * P**-start
+    fwd, inv = _poly_powers(cp.shape[0])
+    prefix = np.zeros(cp.shape[0] + 1, dtype=np.uint64)
+    np.cumsum(cp * fwd, out=prefix[1:])
+    hashes = (prefix[ends] - prefix[starts]) * inv[starts] * _HASH_MIX
+    text_starts = np.cumsum([0] + [len(t) + 1 for t in lowered[:-1]])
+    return hashes, np.searchsorted(text_starts, starts, side="right") - 1
+
+class OnnxSentenceEncoder:
+    """all-MiniLM-L6-v2 exported to ONNX with INT8 weights.
+
+    Mirrors the subset of SentenceTransformer.encode used here; mean pooling
+    and L2 normalization are done in NumPy.
+    """
+    def __init__(self, model_dir: str, max_length: int = 256, num_threads: int = _CPU_COUNT):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        opts = ort.SessionOptions()
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        opts.intra_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, "model_quantized.onnx"),
+            sess_options=opts,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(max_length=max_length)
+        self.tokenizer.enable_padding()
+
+    def encode(self, texts, batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        out = []
+        for i in range(0, len(texts), batch_size):
+            encodings = self.tokenizer.encode_batch(texts[i:i + batch_size])
+            mask = np.array([e.attention_mask for e in encodings], dtype=np.int64)
+            feeds = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": mask,
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64),
+            }
+            hidden = self.session.run(None, {k: v for k, v in feeds.items() if k in self.input_names})[0]
+            # Mean pooling over real (non-padding) tokens
+            weights = mask[..., None].astype(np.float32)
+            pooled = (hidden * weights).sum(axis=1) / np.clip(weights.sum(axis=1), 1e-9, None)
+            if normalize_embeddings:
+                pooled /= np.linalg.norm(pooled, axis=1, keepdims=True) + 1e-9
+            out.append(pooled.astype(np.float32))
+        embeddings = np.vstack(out)
+        return embeddings[0] if single else embeddings
+
+# Set in ingestion worker processes by _init_embed_worker
+_worker_embedder = None
+
+def _init_embed_worker(dim: int, onnx_dir: str | None, num_threads: int, load_model: bool = True):
+    global _worker_embedder
+    _worker_embedder = SemanticEmbedder(dim=dim, onnx_dir=onnx_dir, num_threads=num_threads,
+                                        load_model=load_model)
+
+def _embed_shard(texts: List[str], batch_size: int) -> np.ndarray:
+    return _worker_embedder._encode_batch(texts, batch_size)
 
 class SemanticEmbedder:
-    def __init__(self, dim: int = 384):
+    PARALLEL_MIN_TEXTS = 256  # below this, worker IPC costs more than it saves
+    QUERY_BATCH_SIZE = 32  # forward-pass batch for embed_queries, independent of request size
+    # Hash fallback: signed feature hashing. Each token hashes to one of 2**12 rows,
+    # every row adds +/-1 at FALLBACK_NNZ fixed dims, and a text embeds as the sum
+    # over its tokens (a sparse random projection of its bag of words).
+    FALLBACK_ROW_BITS = 12
+    FALLBACK_NNZ = 8
+    FALLBACK_SEED = 384
+    FALLBACK_BATCH = 1024  # texts per vectorized pass, bounds the temporary arrays
+
+    def __init__(self, dim: int = 384, cache_path: str | None = None, onnx_dir: str | None = None,
+                 workers: int = 1, num_threads: int = _CPU_COUNT, load_model: bool = True):
         self.dim = dim
-        try:
-            from sentence_transformers import SentenceTransformer
-            # Use a lightweight but effective model
-            self.model = SentenceTransformer('all-MiniLM-L6-v2')
-            print("✅ Loaded Sentence-Transformers semantic embedder")
-            self.use_semantic = True
-        except ImportError:
-            print("⚠️  Sentence-Transformers not available, falling back to hash-based embedder")
-            self.use_semantic = False
+        self.onnx_dir = onnx_dir
+        self.load_model = load_model
+        self.workers = max(1, workers)
+        self._pool = None
+        self._pool_lock = threading.Lock()
+        self.use_semantic = False
+        self.model_name = "hash-fallback"
+        if load_model and onnx_dir and os.path.exists(os.path.join(onnx_dir, "model_quantized.onnx")):
+            try:
+                self.model = OnnxSentenceEncoder(onnx_dir, num_threads=num_threads)
+                self.model_name = "all-MiniLM-L6-v2-onnx-int8"
+                self.use_semantic = True
+                print("✅ Loaded ONNX Runtime INT8 semantic embedder")
+            except Exception as e:
+                print(f"⚠️  Failed to load ONNX embedder from {onnx_dir}: {e}")
+        if load_model and not self.use_semantic:
+            try:
+                import torch
+                from sentence_transformers import SentenceTransformer
+                torch.set_num_threads(num_threads)
+                try:
+                    torch.set_num_interop_threads(1)
+                except RuntimeError:
+                    pass  # Can only be set once, before any parallel work has started
+                # Use a lightweight but effective model
+                self.model = SentenceTransformer('all-MiniLM-L6-v2')
+                self.model_name = "all-MiniLM-L6-v2"
+                print("✅ Loaded Sentence-Transformers semantic embedder")
+                self.use_semantic = True
+            except ImportError:
+                print("⚠️  Sentence-Transformers not available, falling back to hash-based embedder")
+        if not self.use_semantic:
+            rng = np.random.default_rng(self.FALLBACK_SEED)
+            shape = (1 << self.FALLBACK_ROW_BITS, self.FALLBACK_NNZ)
+            self._fallback_dims = rng.integers(0, dim, shape)
+            self._fallback_signs = rng.choice([-1.0, 1.0], shape)
+
+        self._query_cache = LRUCache(maxsize=4096)
+        self.cache = None
+        if cache_path:
+            try:
+                self.cache = EmbeddingCache(cache_path, model=self.model_name, dim=dim)
+            except Exception as e:
+                print(f"⚠️  Embedding cache unavailable at {cache_path}: {e}")
+
+    def _fit_dim(self, embeddings: np.ndarray) -> np.ndarray:
+        """Truncate or zero-pad embeddings (last axis) to self.dim"""
+        width = embeddings.shape[-1]
+        if width > self.dim:
+            embeddings = embeddings[..., :self.dim]
+        elif width < self.dim:
+            padded = np.zeros(embeddings.shape[:-1] + (self.dim,), dtype=np.float32)
+            padded[..., :width] = embeddings
+            embeddings = padded
+        return embeddings.astype(np.float32, copy=False)
+
+    def warmup(self):
+        """Run one throwaway forward pass so session/graph init isn't paid by the first request"""
+        self._encode_batch(["warmup"], batch_size=1)
 
     def embed(self, text: str) -> np.ndarray:
+        cached = self._query_cache.get(text)
+        if cached is None:
+            cached = self._embed(text)
+            # Shared between callers, so make sure nobody mutates it in place
+            cached.setflags(write=False)
+            self._query_cache.put(text, cached)
+        return cached
+
+    def embed_queries(self, texts: List[str]) -> np.ndarray:
+        """Embed several queries with one forward pass, sharing the per-query LRU"""
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        misses = {}
+        for i, text in enumerate(texts):
+            cached = self._query_cache.get(text)
+            if cached is None:
+                misses.setdefault(text, []).append(i)
+            else:
+                out[i] = cached
+        if misses:
+            encoded = self._encode_batch(list(misses), batch_size=self.QUERY_BATCH_SIZE)
+            for (text, rows), vec in zip(misses.items(), encoded):
+                out[rows] = vec
+                vec = vec.copy()
+                vec.setflags(write=False)
+                self._query_cache.put(text, vec)
+        return out
+
+    def _embed(self, text: str) -> np.ndarray:
+        # Same path as embed_queries, so a query's cached vector doesn't depend on which call made it
+        return self._encode_batch([text], batch_size=1)[0]
+
+    def _fallback_embed_batch(self, texts: List[str]) -> np.ndarray:
+        V = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for lo in range(0, len(texts), self.FALLBACK_BATCH):
+            batch = texts[lo:lo + self.FALLBACK_BATCH]
+            hashes, owners = _token_hashes(batch)
+            # Top bits of the mixed hash pick the row (the low bits of a product are weak)
+            rows = (hashes >> np.uint64(64 - self.FALLBACK_ROW_BITS)).astype(np.intp)
+            # One scatter-add for the whole batch: cell = text * dim + dim index
+            cells = (owners[:, None] * self.dim + self._fallback_dims[rows]).ravel()
+            V[lo:lo + len(batch)] = np.bincount(
+                cells, weights=self._fallback_signs[rows].ravel(), minlength=len(batch) * self.dim
+            ).reshape(len(batch), self.dim)
+        # Row norms in one pass, then scale in place
+        norms = np.einsum("ij,ij->i", V, V)
+        V *= (1.0 / np.sqrt(norms + 1e-18))[:, None]
+        return V
+
+    def embed_batch(self, texts: List[str], batch_size: int = 64) -> np.ndarray:
+        """Embed many texts at once, returning a [N, dim] float32 matrix"""
+        if not texts:
+            return np.empty((0, self.dim), dtype=np.float32)
+        if self.cache is None:
+            return self._encode(texts, batch_size)
+
+        # Only run the model on texts we have never embedded before
+        hashes = [doc_hash(t) for t in texts]
+        hits = self.cache.get_many(list(set(hashes)))
+        miss_idx = [i for i, h in enumerate(hashes) if h not in hits]
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        if miss_idx:
+            encoded = self._encode([texts[i] for i in miss_idx], batch_size)
+            out[miss_idx] = encoded
+            self.cache.put_many([hashes[i] for i in miss_idx], encoded)
+        for i, h in enumerate(hashes):
+            if h in hits:
+                out[i] = hits[h]
+        return out
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # spawn, not fork: forking after torch/OpenMP threads have started can deadlock.
+                # Workers split the cores so they don't oversubscribe each other.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_embed_worker,
+                    initargs=(self.dim, self.onnx_dir, max(1, _CPU_COUNT // self.workers), self.load_model),
+                )
+            return self._pool
+
+    def _encode(self, texts: List[str], batch_size: int) -> np.ndarray:
+        """Encode texts, sharding large batches across the worker pool when enabled"""
+        if self.workers == 1 or len(texts) < self.PARALLEL_MIN_TEXTS:
+            return self._encode_batch(texts, batch_size)
+        step = -(-len(texts) // self.workers)
+        shards = [texts[i:i + step] for i in range(0, len(texts), step)]
+        return np.vstack(list(self._get_pool().map(_embed_shard, shards, repeat(batch_size))))
+
+    def _encode_batch(self, texts: List[str], batch_size: int) -> np.ndarray:
         if self.use_semantic:
-            # Use real semantic embeddings
-            embedding = self.model.encode(text, convert_to_numpy=True)
-            # Ensure consistent dimensionality
-            if len(embedding) != self.dim:
-                if len(embedding) > self.dim:
-                    # Truncate
-                    embedding = embedding[:self.dim]
-                else:
-                    # Pad with zeros
-                    padded = np.zeros(self.dim, dtype=np.float32)
-                    padded[:len(embedding)] = embedding
-                    embedding = padded
-            return embedding.astype(np.float32)
-        else:
-            # Fallback to simple hash-based (for compatibility)
-            h = hashlib.sha1(text.encode("utf-8")).digest()
-            rng_seed = int.from_bytes(h[:8], "big") % (2**32-1)
-            rng = np.random.default_rng(rng_seed)
-            v = rng.standard_normal(self.dim).astype("float32")
-            v = v / (np.linalg.norm(v) + 1e-9)
-            return v
+            # Pass the whole list so sentence-transformers can sort by length
+            # and run one forward pass per batch instead of one per text
+            embeddings = self.model.encode(
+                texts,
+                batch_size=batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                show_progress_bar=False,
+            )
+            return self._fit_dim(embeddings)
+        return self._fallback_embed_batch(texts)
 
 class LocalEmbedder(SemanticEmbedder):
     """Backward compatibility alias"""
     pass
 
+@functools.lru_cache(maxsize=1)
+def get_embedder() -> LocalEmbedder:
+    """Process-wide embedder, so the model is loaded once and shared by every engine"""
+    return LocalEmbedder(
+        dim=384,
+        cache_path=settings.embedding_cache_path,
+        onnx_dir=settings.onnx_model_dir,
+        workers=settings.embed_workers,
+        load_model=not settings.fake_embed,
+    )
+
 # ---- Vector store abstraction ----
 class InMemoryStore:
-    def __init__(self, dim: int = 384):
+    def __init__(self, dim: int = 384, capacity: int = 1024):
         self.dim = dim
-        self.vecs: List[np.ndarray] = []
-        self.meta: List[Dict] = []
+        # Pre-normalized rows live in one contiguous buffer; only the first
+        # self._size rows are valid. Grows by doubling like std::vector.
+        self.capacity = capacity
+        self._buffer = np.empty((capacity, dim), dtype=np.float32)
+        self._size = 0
+        self.metadatas: List[Dict] = []
         self._hashes = set()
 
+    @property
+    def vectors(self) -> np.ndarray:
+        """[N, d] view of the stored unit-length vectors"""
+        return self._buffer[:self._size]
+
+    def _reserve(self, needed: int):
+        if needed <= self.capacity:
+            return
+        capacity = max(1, self.capacity)  # doubling 0 would never grow
+        while capacity < needed:
+            capacity *= 2
+        grown = np.empty((capacity, self.dim), dtype=np.float32)
+        np.copyto(grown[:self._size], self.vectors)
+        self._buffer = grown
+        self.capacity = capacity
+
     def upsert(self, vectors: List[np.ndarray], metadatas: List[Dict]):
-        for v, m in zip(vectors, metadatas):
-            self.vectors.append(v)
-            self.metadatas.append(m)
+        # Same semantics as Qdrant: a chunk hash that is already stored is not added twice
+        keep = [i for i, m in enumerate(metadatas) if not m.get("hash") or m["hash"] not in self._hashes]
+        if not keep:
+            return
+        batch = np.array([vectors[i] for i in keep], dtype=np.float32).reshape(-1, self.dim)
+        batch /= np.linalg.norm(batch, axis=1, keepdims=True) + 1e-9
+        n = batch.shape[0]
+        self._reserve(self._size + n)
+        np.copyto(self._buffer[self._size:self._size + n], batch)
+        self.metadatas.extend(metadatas[i] for i in keep)
+        self._hashes.update(metadatas[i]["hash"] for i in keep if metadatas[i].get("hash"))
+        # Publish the new rows last: a concurrent search only sees rows < _size,
+        # and by now every one of them has its vector and metadata in place
+        self._size += n
 
     def count(self) -> int:
         """Get actual count of vectors in memory"""
-        return len(self.vectors)
+        return self.vectors.shape[0]
 
     def search(self, query: np.ndarray, k: int = 4) -> List[Tuple[float, Dict]]:
-        if not self.vecs:
+        if self._size == 0 or k <= 0:
             return []
-        A = np.vstack(self.vecs)  # [N, d]
-        q = query.reshape(1, -1)  # [1, d]
-        # cosine similarity
-        sims = (A @ q.T).ravel() / (np.linalg.norm(A, axis=1) * (np.linalg.norm(q) + 1e-9) + 1e-9)
-        idx = np.argsort(-sims)[:k]
-        return [(float(sims[i]), self.meta[i]) for i in idx]
+        q = np.asarray(query, dtype=np.float32).ravel()
+        q = q / (np.linalg.norm(q) + 1e-9)
+        # Rows are already unit length, so cosine similarity is one GEMV
+        sims = self.vectors @ q
+        # Quickselect the top k (O(N)), then sort only those k
+        neg = -sims
+        k = min(k, neg.shape[0])
+        idx = np.argpartition(neg, k - 1)[:k] if k < neg.shape[0] else np.arange(k)
+        idx = idx[np.argsort(neg[idx], kind="stable")]
+        return [(float(sims[i]), self.metadatas[i]) for i in idx]
+
+    async def search_async(self, query: np.ndarray, k: int = 4) -> List[Tuple[float, Dict]]:
+        return await asyncio.to_thread(self.search, query, k)
+
+    def search_batch(self, queries: np.ndarray, k: int = 4) -> List[List[Tuple[float, Dict]]]:
+        """Top-k for several queries with a single GEMM against the corpus"""
+        Q = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self._size == 0 or k <= 0:
+            return [[] for _ in range(Q.shape[0])]
+        Q = Q / (np.linalg.norm(Q, axis=1, keepdims=True) + 1e-9)
+        neg = -(Q @ self.vectors.T)
+        k = min(k, neg.shape[1])
+        idx = np.argpartition(neg, k - 1, axis=1)[:, :k] if k < neg.shape[1] else np.tile(np.arange(k), (neg.shape[0], 1))
+        order = np.argsort(np.take_along_axis(neg, idx, axis=1), axis=1, kind="stable")
+        idx = np.take_along_axis(idx, order, axis=1)
+        return [[(float(-neg[r, i]), self.metadatas[i]) for i in row] for r, row in enumerate(idx)]
 
 class QdrantStore:
+    UPSERT_BATCH = 256
+    # Concurrent async searches arriving within this window share one search_batch call
+    SEARCH_BATCH_WINDOW_S = 0.005
+    SEARCH_BATCH_MAX = 32
+
     def __init__(self, collection: str, dim: int = 384):
-        self.client = QdrantClient(url="http://qdrant:6333", timeout=10.0)
+        # gRPC (port 6334) keeps one HTTP/2 channel open and encodes vectors as packed floats
+        self.client = QdrantClient(url="http://qdrant:6333", prefer_grpc=True, timeout=30)
         self.collection = collection
         self.dim = dim
         self._ensure_collection()
+        # Micro-batching state, bound to the event loop that first used it
+        self._search_loop = None
+        self._search_queue: Optional[asyncio.Queue] = None
+        self._search_task = None
 
     def _ensure_collection(self):
         try:
@@ -90,22 +496,47 @@ class QdrantStore:
         except Exception:
             self.client.recreate_collection(
                 collection_name=self.collection,
-                vectors_config=qm.VectorParams(size=self.dim, distance=qm.Distance.COSINE)
+                vectors_config=qm.VectorParams(size=self.dim, distance=qm.Distance.COSINE),
+                # int8 copies of the vectors are scanned in RAM (4x smaller than float32);
+                # the original vectors are only used to rescore the top candidates
+                quantization_config=qm.ScalarQuantization(
+                    scalar=qm.ScalarQuantizationConfig(
+                        type=qm.ScalarType.INT8,
+                        quantile=0.99,
+                        always_ram=True,
+                    )
+                ),
             )
 
+    @staticmethod
+    def _point_id(i: int, m: Dict):
+        # Convert hash string to integer for Qdrant compatibility
+        if m.get("hash"):
+            # Convert hex hash to integer (take first 8 bytes to avoid overflow)
+            return int(m["hash"][:16], 16)
+        elif m.get("id"):
+            return m["id"] if isinstance(m["id"], int) else i
+        return i
+
     def upsert(self, vectors: List[np.ndarray], metadatas: List[Dict]):
-        points = []
-        for i, (v, m) in enumerate(zip(vectors, metadatas)):
-            # Convert hash string to integer for Qdrant compatibility
-            point_id = i
-            if m.get("hash"):
-                # Convert hex hash to integer (take first 8 bytes to avoid overflow)
-                point_id = int(m["hash"][:16], 16)
-            elif m.get("id"):
-                point_id = m["id"] if isinstance(m["id"], int) else i
-            
-            points.append(qm.PointStruct(id=point_id, vector=v.tolist(), payload=m))
-        self.client.upsert(collection_name=self.collection, points=points)
+        if len(vectors) == 0:
+            return
+        matrix = np.ascontiguousarray(np.vstack(vectors), dtype=np.float32)
+        ids = [self._point_id(i, m) for i, m in enumerate(metadatas)]
+        # Fire batches without waiting for the server to apply them; only the
+        # last one waits so count() is accurate once upsert returns. Updates
+        # to a collection are applied in order.
+        for start in range(0, len(ids), self.UPSERT_BATCH):
+            end = start + self.UPSERT_BATCH
+            self.client.upsert(
+                collection_name=self.collection,
+                points=qm.Batch(
+                    ids=ids[start:end],
+                    vectors=matrix[start:end].tolist(),
+                    payloads=metadatas[start:end],
+                ),
+                wait=end >= len(ids),
+            )
 
     def count(self) -> int:
         """Get actual count of vectors in the collection"""
@@ -127,7 +558,77 @@ class QdrantStore:
             out.append((float(r.score), dict(r.payload)))
         return out
 
+    def search_batch(self, queries: np.ndarray, k: int = 4) -> List[List[Tuple[float, Dict]]]:
+        requests = [qm.SearchRequest(vector=q.tolist(), limit=k, with_payload=True) for q in queries]
+        responses = self.client.search_batch(collection_name=self.collection, requests=requests)
+        return [[(float(r.score), dict(r.payload)) for r in res] for res in responses]
+
+    async def search_async(self, query: np.ndarray, k: int = 4) -> List[Tuple[float, Dict]]:
+        loop = asyncio.get_running_loop()
+        # (Re)start the batcher on a new event loop, or if the previous one ever exited
+        if self._search_loop is not loop or self._search_task is None or self._search_task.done():
+            self._search_loop = loop
+            self._search_queue = asyncio.Queue()
+            self._search_task = loop.create_task(self._search_batcher(self._search_queue))
+        future = loop.create_future()
+        await self._search_queue.put((query, k, future))
+        return await future
+
+    async def _search_batcher(self, queue: asyncio.Queue):
+        loop = asyncio.get_running_loop()
+        batch = []
+        try:
+            while True:
+                batch = [await queue.get()]
+                deadline = loop.time() + self.SEARCH_BATCH_WINDOW_S
+                while len(batch) < self.SEARCH_BATCH_MAX:
+                    timeout = deadline - loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                try:
+                    requests = [
+                        qm.SearchRequest(vector=query.tolist(), limit=k, with_payload=True)
+                        for query, k, _ in batch
+                    ]
+                    responses = await asyncio.to_thread(
+                        self.client.search_batch, collection_name=self.collection, requests=requests
+                    )
+                    if len(responses) != len(batch):
+                        raise RuntimeError(f"search_batch returned {len(responses)} results for {len(batch)} queries")
+                    for (_, _, future), res in zip(batch, responses):
+                        if not future.done():
+                            future.set_result([(float(r.score), dict(r.payload)) for r in res])
+                except Exception as e:
+                    for _, _, future in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                batch = []
+        finally:
+            # Cancelled or crashed: fail everything in flight or queued so no caller waits forever
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Qdrant search batcher stopped"))
+
 # ---- LLM provider ----
+LLM_CONTEXT_CHARS = 600  # per-chunk text budget in the prompt
+
+def _llm_text(c: Dict) -> str:
+    # Retrieval pre-truncates chunks once; only ad-hoc contexts need slicing here
+    text = c.get("text_for_llm")
+    return text if text is not None else (c.get("text") or "")[:LLM_CONTEXT_CHARS]
+
+def _build_prompt(query: str, contexts: List[Dict]) -> str:
+    parts = [f"You are a helpful company policy assistant. Cite sources by title and section when relevant.\nQuestion: {query}\nSources:\n"]
+    parts.extend(f"- {c.get('title')} | {c.get('section')}\n{_llm_text(c)}\n---\n" for c in contexts)
+    parts.append("Write a concise, accurate answer grounded in the sources. If unsure, say so.")
+    return "".join(parts)
+
 class StubLLM:
     def generate(self, query: str, contexts: List[Dict]) -> str:
         lines = [f"Answer (stub): Based on the following sources:"]
@@ -140,68 +641,146 @@ class StubLLM:
         lines.append(joined[:600] + ("..." if len(joined) > 600 else ""))
         return "\n".join(lines)
 
+    async def agenerate(self, query: str, contexts: List[Dict]) -> str:
+        return self.generate(query, contexts)
+
+    def is_healthy(self) -> bool:
+        return True  # Stub is always healthy
+
 class OpenAILLM:
     def __init__(self, api_key: str):
-        from openai import OpenAI
+        from openai import OpenAI, AsyncOpenAI
         self.client = OpenAI(api_key=api_key)
+        self.async_client = AsyncOpenAI(api_key=api_key)
+
+    def is_healthy(self) -> bool:
+        # No cheap probe worth a network call; auth/quota errors surface on the first ask
+        return True
+
+    def _request(self, query: str, contexts: List[Dict]) -> Dict:
+        return {
+            "model": "gpt-4o-mini",
+            "messages": [{"role": "user", "content": _build_prompt(query, contexts)}],
+            "temperature": 0.1,
+        }
+
+    @staticmethod
+    def _error_message(e: Exception) -> str:
+        error_msg = str(e)
+        if "401" in error_msg or "authentication" in error_msg.lower():
+            return "❌ OpenAI API authentication failed. Please check your API key in the .env file."
+        elif "quota" in error_msg.lower() or "limit" in error_msg.lower():
+            return "❌ OpenAI API quota exceeded. Please check your usage limits."
+        else:
+            return f"❌ OpenAI API error: {error_msg[:100]}..."
 
     def generate(self, query: str, contexts: List[Dict]) -> str:
         try:
-            prompt = f"You are a helpful company policy assistant. Cite sources by title and section when relevant.\nQuestion: {query}\nSources:\n"
-            for c in contexts:
-                prompt += f"- {c.get('title')} | {c.get('section')}\n{c.get('text')[:600]}\n---\n"
-            prompt += "Write a concise, accurate answer grounded in the sources. If unsure, say so."
-            resp = self.client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[{"role":"user","content":prompt}],
-                temperature=0.1
-            )
+            resp = self.client.chat.completions.create(**self._request(query, contexts))
             return resp.choices[0].message.content
         except Exception as e:
-            error_msg = str(e)
-            if "401" in error_msg or "authentication" in error_msg.lower():
-                return "❌ OpenAI API authentication failed. Please check your API key in the .env file."
-            elif "quota" in error_msg.lower() or "limit" in error_msg.lower():
-                return "❌ OpenAI API quota exceeded. Please check your usage limits."
-            else:
-                return f"❌ OpenAI API error: {error_msg[:100]}..."
+            return self._error_message(e)
+
+    async def agenerate(self, query: str, contexts: List[Dict]) -> str:
+        try:
+            resp = await self.async_client.chat.completions.create(**self._request(query, contexts))
+            return resp.choices[0].message.content
+        except Exception as e:
+            return self._error_message(e)
 
 class OllamaLLM:
     def __init__(self, host: str = "http://localhost:11434"):
         import httpx
         self.host = host.rstrip('/')
         self.client = httpx.Client(timeout=120.0)
-        
-    def generate(self, query: str, contexts: List[Dict]) -> str:
+        self.async_client = httpx.AsyncClient(timeout=120.0)
+
+    def is_healthy(self) -> bool:
+        """Ollama is up if it can list its models (no generation)"""
         try:
-            prompt = f"You are a helpful company policy assistant. Cite sources by title and section when relevant.\nQuestion: {query}\nSources:\n"
-            for c in contexts:
-                prompt += f"- {c.get('title')} | {c.get('section')}\n{c.get('text')[:600]}\n---\n"
-            prompt += "Write a concise, accurate answer grounded in the sources. If unsure, say so."
-            
-            payload = {
-                "model": "llama3.2:1b",  # Lightweight model
-                "prompt": prompt,
-                "stream": False,
-                "options": {
-                    "temperature": 0.1,
-                    "num_predict": 500
-                }
+            return self.client.get(f"{self.host}/api/tags", timeout=1.0).status_code == 200
+        except Exception:
+            return False
+
+    def _payload(self, query: str, contexts: List[Dict]) -> Dict:
+        return {
+            "model": "llama3.2:1b",  # Lightweight model
+            "prompt": _build_prompt(query, contexts),
+            "stream": False,
+            "options": {
+                "temperature": 0.1,
+                "num_predict": 500
             }
-            
-            response = self.client.post(f"{self.host}/api/generate", json=payload)
+        }
+
+    @staticmethod
+    def _error_message(e: Exception) -> str:
+        error_msg = str(e)
+        if "connection" in error_msg.lower() or "refused" in error_msg.lower():
+            return "❌ Cannot connect to Ollama. Please ensure Ollama is running and accessible."
+        elif "timeout" in error_msg.lower():
+            return "❌ Ollama request timed out. The model may be loading or overloaded."
+        elif "404" in error_msg:
+            return "❌ Ollama model 'llama3.2:1b' not found. Please pull the model: `ollama pull llama3.2:1b`"
+        else:
+            return f"❌ Ollama error: {error_msg[:100]}..."
+
+    def generate(self, query: str, contexts: List[Dict]) -> str:
+        try:
+            response = self.client.post(f"{self.host}/api/generate", json=self._payload(query, contexts))
             response.raise_for_status()
             return response.json().get("response", "Sorry, I couldn't generate a response.")
         except Exception as e:
-            error_msg = str(e)
-            if "connection" in error_msg.lower() or "refused" in error_msg.lower():
-                return "❌ Cannot connect to Ollama. Please ensure Ollama is running and accessible."
-            elif "timeout" in error_msg.lower():
-                return "❌ Ollama request timed out. The model may be loading or overloaded."
-            elif "404" in error_msg:
-                return "❌ Ollama model 'llama3.2:1b' not found. Please pull the model: `ollama pull llama3.2:1b`"
-            else:
-                return f"❌ Ollama error: {error_msg[:100]}..."
+            return self._error_message(e)
+
+    async def agenerate(self, query: str, contexts: List[Dict]) -> str:
+        try:
+            response = await self.async_client.post(f"{self.host}/api/generate", json=self._payload(query, contexts))
+            response.raise_for_status()
+            return response.json().get("response", "Sorry, I couldn't generate a response.")
+        except Exception as e:
+            return self._error_message(e)
+
+# ---- Semantic answer cache ----
+class SemanticAnswerCache:
+    """Reuse answers across paraphrased questions.
+
+    A cached answer is served only if the new query embedding is close to a
+    cached one AND the chunks freshly retrieved for the new query overlap the
+    evidence the cached answer was generated from (Jaccard over chunk hashes).
+    """
+    def __init__(self, dim: int = 384, threshold: float = 0.92, min_overlap: float = 0.7,
+                 maxsize: int = 1024, candidates: int = 4):
+        self.dim = dim
+        self.threshold = threshold
+        self.min_overlap = min_overlap
+        self.maxsize = maxsize
+        self.candidates = candidates
+        self._lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self._store = InMemoryStore(dim=self.dim, capacity=64)
+
+    @staticmethod
+    def _jaccard(a: set, b: set) -> float:
+        union = a | b
+        return len(a & b) / len(union) if union else 0.0
+
+    def lookup(self, query_vec: np.ndarray, evidence: set, scope: Tuple) -> Optional[str]:
+        with self._lock:
+            for score, entry in self._store.search(query_vec, k=self.candidates):
+                if score < self.threshold:
+                    break
+                if entry["scope"] == scope and self._jaccard(entry["evidence"], evidence) >= self.min_overlap:
+                    return entry["answer"]
+        return None
+
+    def add(self, query_vec: np.ndarray, evidence: set, scope: Tuple, answer: str):
+        with self._lock:
+            if self._store.count() >= self.maxsize:
+                self.clear()
+            self._store.upsert([query_vec], [{"scope": scope, "evidence": evidence, "answer": answer}])
 
 # ---- RAG Orchestrator & Metrics ----
 class Metrics:
@@ -216,8 +795,8 @@ class Metrics:
         self.t_generation.append(ms)
 
     def summary(self) -> Dict:
-        avg_r = sum(self.t_retrieval)/len(self.t_retrieval) if self.t_retrieval else 0.0
-        avg_g = sum(self.t_generation)/len(self.t_generation) if self.t_generation else 0.0
+        avg_r = statistics.fmean(self.t_retrieval) if self.t_retrieval else 0.0
+        avg_g = statistics.fmean(self.t_generation) if self.t_generation else 0.0
         return {
             "avg_retrieval_latency_ms": round(avg_r, 2),
             "avg_generation_latency_ms": round(avg_g, 2),
@@ -225,7 +804,7 @@ class Metrics:
 
 class RAGEngine:
     def __init__(self):
-        self.embedder = LocalEmbedder(dim=384)
+        self.embedder = get_embedder()
         # Vector store selection
         if settings.vector_store == "qdrant":
             try:
@@ -266,27 +845,39 @@ class RAGEngine:
             self.llm_name = "stub"
             print(f"✅ Using stub LLM (provider: {settings.llm_provider})")
             
-        # Add LLM health check
-        self._llm_healthy = self._check_llm_health()
+        # LLM health is probed lazily (first /api/metrics call), not at startup
+        self._llm_healthy: Optional[bool] = None
+        self._llm_checked_at = 0.0
 
         self.metrics = Metrics()
         self._doc_titles = set()
         self._chunk_count = 0
+        # Bumped whenever ingest adds chunks so cached answers and retrievals go stale
+        self._corpus_version = 0
+        self._answer_cache = LRUCache(maxsize=1024)
+        # (query embedding, top-k contexts) per normalized query; safe while the corpus is unchanged
+        self._retrieval_cache = LRUCache(maxsize=2048)
+        self._semantic_cache = SemanticAnswerCache(dim=384)
         
         # Sync with existing data on startup
         self._sync_with_existing_data()
 
+    LLM_HEALTH_TTL_S = 30.0
+    BATCH_GENERATION_CONCURRENCY = 4  # in-flight LLM calls per /api/ask_batch request
+
     def _check_llm_health(self) -> bool:
-        """Quick health check for the LLM"""
-        try:
-            if isinstance(self.llm, StubLLM):
-                return True  # Stub is always healthy
-            
-            # Quick test generation
-            test_response = self.llm.generate("Test", [{"title": "Test", "section": "Test", "text": "Test"}])
-            return not test_response.startswith("❌")
-        except Exception:
-            return False
+        """Quick health check for the LLM, cached for LLM_HEALTH_TTL_S"""
+        now = time.monotonic()
+        if self._llm_healthy is None or now - self._llm_checked_at > self.LLM_HEALTH_TTL_S:
+            try:
+                self._llm_healthy = self.llm.is_healthy()
+            except Exception:
+                self._llm_healthy = False
+            self._llm_checked_at = now
+        return self._llm_healthy
+
+    def has_documents(self) -> bool:
+        return bool(self._doc_titles)
 
     def _sync_with_existing_data(self):
         """Sync internal counters with existing data in the vector store"""
@@ -310,8 +901,8 @@ class RAGEngine:
                         
             elif isinstance(self.store, InMemoryStore):
                 # For in-memory store, count existing data
-                self._chunk_count = len(self.store.vecs)
-                for meta in self.store.meta:
+                self._chunk_count = self.store.vectors.shape[0]
+                for meta in self.store.metadatas:
                     if "title" in meta:
                         self._doc_titles.add(meta["title"])
                         
@@ -321,12 +912,12 @@ class RAGEngine:
             self._chunk_count = 0
 
     def ingest_chunks(self, chunks: List[Dict]) -> Tuple[int, int]:
-        vectors = []
         metas = []
-        doc_titles_before = set(self._doc_titles)
+        new_docs = 0
         processed_hashes = set()
         chunks_before = self.store.count()
 
+        texts = []
         for ch in chunks:
             text = ch["text"]
             h = doc_hash(text)
@@ -342,33 +933,133 @@ class RAGEngine:
                 "section": ch.get("section"),
                 "text": text,
             }
-            v = self.embedder.embed(text)
-            vectors.append(v)
+            texts.append(text)
             metas.append(meta)
             processed_hashes.add(h)
-            self._doc_titles.add(ch["title"])
+            if ch["title"] not in self._doc_titles:
+                self._doc_titles.add(ch["title"])
+                new_docs += 1
 
-        if vectors:
+        if texts:
+            vectors = list(self.embedder.embed_batch(texts, batch_size=64))
             self.store.upsert(vectors, metas)
             
         # Return actual counts: new docs and chunks added
-        new_docs = len(self._doc_titles) - len(doc_titles_before)
         chunks_after = self.store.count()
         new_chunks = chunks_after - chunks_before
+        if new_chunks > 0:
+            self._corpus_version += 1
+            self._semantic_cache.clear()
             
         return (new_docs, max(0, new_chunks))  # Ensure non-negative
 
+    def _answer_key(self, query: str, k: int) -> Tuple:
+        return (query.strip().lower(), k, self.llm_name, self._corpus_version)
+
+    async def answer_async(self, query: str, k: int = 4) -> Tuple[str, List[Dict]]:
+        """Answer a question, returning (answer, contexts) and reusing cached answers when safe"""
+        cached = self._answer_cache.get(self._answer_key(query, k))
+        if cached:
+            return cached
+
+        qv, ctx = await self._retrieve_async(query, k)
+        return await self._answer_from_contexts(query, k, qv, ctx)
+
+    async def _answer_from_contexts(self, query: str, k: int, qv: np.ndarray,
+                                    ctx: List[Dict]) -> Tuple[str, List[Dict]]:
+        evidence = {c.get("hash") for c in ctx}
+        scope = (k, self.llm_name, self._corpus_version)
+        answer = self._semantic_cache.lookup(qv, evidence, scope)
+        if answer is None:
+            answer = await self.generate_async(query, ctx)
+            # Don't pin provider errors (auth, quota, timeouts) in the caches
+            if answer.startswith("❌"):
+                return answer, ctx
+            self._semantic_cache.add(qv, evidence, scope, answer)
+        self._answer_cache.put(self._answer_key(query, k), (answer, ctx))
+        return answer, ctx
+
+    async def answer_batch_async(self, queries: List[str], k: int = 4) -> List[Tuple[str, List[Dict]]]:
+        """Answer several questions, embedding and searching all uncached ones in one pass"""
+        unique = list(dict.fromkeys(queries))
+        pending = [
+            q for q in unique
+            if self._answer_cache.get(self._answer_key(q, k)) is None
+            and self._retrieval_cache.get(self._retrieval_key(q, k)) is None
+        ]
+        retrieved = {}
+        if pending:
+            t0 = time.perf_counter()
+            qvs = await asyncio.to_thread(self.embedder.embed_queries, pending)
+            results = await asyncio.to_thread(self.store.search_batch, qvs, k)
+            # Every query in the batch waited for the whole batched retrieval
+            ms = (time.perf_counter()-t0)*1000.0
+            for query, qv, res in zip(pending, qvs, results):
+                retrieved[query] = (qv, self._contexts(res))
+                self._retrieval_cache.put(self._retrieval_key(query, k), retrieved[query])
+                self.metrics.add_retrieval(ms)
+
+        limit = asyncio.Semaphore(self.BATCH_GENERATION_CONCURRENCY)
+
+        async def answer_one(query: str) -> Tuple[str, List[Dict]]:
+            async with limit:
+                if query in retrieved:
+                    return await self._answer_from_contexts(query, k, *retrieved[query])
+                return await self.answer_async(query, k)
+
+        answers = dict(zip(unique, await asyncio.gather(*(answer_one(q) for q in unique))))
+        return [answers[q] for q in queries]
+
+    @staticmethod
+    def _contexts(results: List[Tuple[float, Dict]]) -> List[Dict]:
+        """Strip scores and attach the LLM-sized text to each chunk (once per chunk)"""
+        out = []
+        for score, meta in results:
+            if "text_for_llm" not in meta:
+                meta["text_for_llm"] = meta.get("text", "")[:LLM_CONTEXT_CHARS]
+            out.append(meta)
+        return out
+
+    def _retrieval_key(self, query: str, k: int) -> Tuple:
+        return (query.strip().lower(), k, self._corpus_version)
+
     def retrieve(self, query: str, k: int = 4) -> List[Dict]:
-        t0 = time.time()
-        qv = self.embedder.embed(query)
-        results = self.store.search(qv, k=k)
-        self.metrics.add_retrieval((time.time()-t0)*1000.0)
-        return [meta for score, meta in results]
+        t0 = time.perf_counter()
+        key = self._retrieval_key(query, k)
+        cached = self._retrieval_cache.get(key)
+        if cached is None:
+            qv = self.embedder.embed(query)
+            cached = (qv, self._contexts(self.store.search(qv, k=k)))
+            self._retrieval_cache.put(key, cached)
+        self.metrics.add_retrieval((time.perf_counter()-t0)*1000.0)
+        return cached[1]
+
+    async def _retrieve_async(self, query: str, k: int) -> Tuple[np.ndarray, List[Dict]]:
+        t0 = time.perf_counter()
+        key = self._retrieval_key(query, k)
+        cached = self._retrieval_cache.get(key)
+        if cached is None:
+            # Embedding and vector search are CPU/blocking work; keep them off the event loop
+            qv = await asyncio.to_thread(self.embedder.embed, query)
+            results = await self.store.search_async(qv, k)
+            cached = (qv, self._contexts(results))
+            self._retrieval_cache.put(key, cached)
+        self.metrics.add_retrieval((time.perf_counter()-t0)*1000.0)
+        return cached
+
+    async def retrieve_async(self, query: str, k: int = 4) -> List[Dict]:
+        return (await self._retrieve_async(query, k))[1]
 
     def generate(self, query: str, contexts: List[Dict]) -> str:
-        t0 = time.time()
+        t0 = time.perf_counter()
         answer = self.llm.generate(query, contexts)
-        self.metrics.add_generation((time.time()-t0)*1000.0)
+        self.metrics.add_generation((time.perf_counter()-t0)*1000.0)
+        return answer
+
+    async def generate_async(self, query: str, contexts: List[Dict]) -> str:
+        t0 = time.perf_counter()
+        answer = await self.llm.agenerate(query, contexts)
+        self.metrics.add_generation((time.perf_counter()-t0)*1000.0)
         return answer
 
     def stats(self) -> Dict:
@@ -378,7 +1069,7 @@ class RAGEngine:
             "total_chunks": self.store.count(),  # Get actual count from store
             "embedding_model": settings.embedding_model,
             "llm_model": self.llm_name,
-            "llm_healthy": self._llm_healthy,
+            "llm_healthy": self._check_llm_health(),
             "vector_store": settings.vector_store,
             **m
         }
@@ -3,6 +3,10 @@ import os
 
 class Settings(BaseModel):
     embedding_model: str = os.getenv("EMBEDDING_MODEL", "local-384")
+    embedding_cache_path: str = os.getenv("EMBEDDING_CACHE_PATH", "/app/.cache/embeddings.db")  # empty disables
+    onnx_model_dir: str = os.getenv("ONNX_MODEL_DIR", "/app/onnx")  # INT8 ONNX export; used when present
+    embed_workers: int = int(os.getenv("EMBED_WORKERS", "1"))  # >1 shards large ingests across processes
+    fake_embed: bool = os.getenv("APP_FAKE_EMBED", "0") == "1"  # hash embedder only, no model load (tests)
     llm_provider: str = os.getenv("LLM_PROVIDER", "stub")  # stub | openai | ollama
     openai_api_key: str | None = os.getenv("OPENAI_API_KEY")
     ollama_host: str = os.getenv("OLLAMA_HOST", "http://ollama:11434")
@@ -1,7 +1,153 @@
+import hashlib
+import os
+import pickle
+
+import httpx
 import pytest
-from fastapi.testclient import TestClient
-from app.main import app
+import pytest_asyncio
+from pytest_asyncio import is_async_test
+from app.settings import settings
+
+# Run the suite end-to-end against an already running server instead of the in-process app
+LIVE_URL = os.getenv("LIVE_URL")
+
+
+# Only registered when this conftest is loaded at startup, i.e. when the tests
+# directory is on the command line: pytest app/tests --no-ingest-cache
+def pytest_addoption(parser):
+    parser.addoption(
+        "--no-ingest-cache",
+        action="store_true",
+        help="always run /api/ingest instead of restoring the on-disk ingest snapshot",
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "serial: depends on per-process engine state; excluded from the parallel (-n) run",
+    )
+    config.addinivalue_line(
+        "markers",
+        "structural: checks response shape only; safe to run with APP_FAKE_EMBED=1",
+    )
+    config.addinivalue_line(
+        "markers",
+        "real_model: needs genuine retrieval quality; skipped when APP_FAKE_EMBED=1",
+    )
+    config.addinivalue_line(
+        "markers",
+        "slow: pays for real LLM generation; deselect with -m 'not slow' for quick feedback",
+    )
+    config.addinivalue_line(
+        "markers",
+        "acceptance: the sample questions the assignment is graded on",
+    )
+    config.addinivalue_line(
+        "markers",
+        "in_process: inspects the in-process engine; skipped when LIVE_URL is set",
+    )
+
+def pytest_collection_modifyitems(items):
+    # One event loop for the whole session, so the session-scoped client (and its
+    # keep-alive connection when LIVE_URL is set) is only ever used from that loop
+    session_loop = pytest.mark.asyncio(scope="session")
+    for item in items:
+        if is_async_test(item):
+            item.add_marker(session_loop, append=False)
+    # Fast checks first, so a broken endpoint fails before any slow generation runs
+    items.sort(key=lambda item: item.get_closest_marker("slow") is not None)
+
+
+@pytest.fixture(autouse=True)
+def _skip_real_model_under_fake_embed(request):
+    # The embedder is built once at import time, so the flag applies to the whole run
+    if settings.fake_embed and request.node.get_closest_marker("real_model"):
+        pytest.skip("needs the real embedder; unset APP_FAKE_EMBED")
+
+
+@pytest.fixture(autouse=True)
+def _skip_in_process_under_live_url(request):
+    # A live server's engine (and its ingest history) isn't visible from the test process
+    if LIVE_URL and (request.node.get_closest_marker("in_process") or request.node.get_closest_marker("serial")):
+        pytest.skip("inspects the in-process engine; not applicable with LIVE_URL")
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _warm_embedder():
+    # Load the shared embedder and run one forward pass before any test is timed
+    if LIVE_URL:
+        return
+    from app.rag import get_embedder
+    get_embedder().warmup()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def client():
+    if LIVE_URL:
+        # One keep-alive connection for the session. HTTP/2 is only used when an
+        # https:// server negotiates it; plain http:// (e.g. uvicorn) stays on HTTP/1.1.
+        c = httpx.AsyncClient(
+            base_url=LIVE_URL,
+            http2=True,
+            limits=httpx.Limits(max_keepalive_connections=1),
+            timeout=60.0,
+        )
+    else:
+        # Calls the ASGI app in-process on the test's own event loop (no sync portal thread).
+        # httpx.ASGITransport is async-only, so a sync httpx.Client can't mount it; the
+        # AsyncClient is the portal-free equivalent of Starlette's TestClient.
+        from app.main import app
+        c = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test")
+    async with c:
+        yield c
+
+
+def _ingest_snapshot_path(config, engine) -> str:
+    """Snapshot file keyed by the sample docs, chunking settings, embedder and the ingest/store code"""
+    from app import ingest, rag
+
+    digest = hashlib.sha256()
+    # Same files load_documents reads
+    for fname in sorted(os.listdir(settings.data_dir)):
+        if fname.lower().endswith((".md", ".txt")):
+            with open(os.path.join(settings.data_dir, fname), "rb") as f:
+                digest.update(fname.encode() + b"\0" + f.read())
+    # A change to chunking, embedding or the pickled store classes invalidates old snapshots
+    for module in (ingest, rag):
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    digest.update(f"{settings.chunk_size}:{settings.chunk_overlap}:{engine.embedder.model_name}".encode())
+    return os.path.join(str(config.cache.mkdir("ingest")), f"ingest_{digest.hexdigest()}.pkl")
+
+
+@pytest_asyncio.fixture(scope="session")
+async def ingested_client(client, request):
+    """Client against an engine that has ingested the sample docs (once per session).
+
+    With the in-memory store, the ingested store is pickled under .pytest_cache
+    and restored on later runs so the embedding pass is skipped.
+    """
+    if LIVE_URL:
+        # A live server keeps its own store, so the snapshot only applies in-process
+        await client.post("/api/ingest")
+        return client
+
+    from app.main import engine
+    from app.rag import InMemoryStore
+    use_snapshot = isinstance(engine.store, InMemoryStore) and not request.config.getoption("--no-ingest-cache", default=False)
+    snapshot = _ingest_snapshot_path(request.config, engine) if use_snapshot else None
+    if snapshot and os.path.exists(snapshot):
+        with open(snapshot, "rb") as f:
+            engine.store, engine._doc_titles = pickle.load(f)
+        engine._corpus_version += 1
+        return client
 
-@pytest.fixture(scope="session")
-def client():
-    return TestClient(app)
+    await client.post("/api/ingest")
+    if snapshot:
+        # xdist workers may race to write the same snapshot; os.replace keeps it whole
+        tmp = f"{snapshot}.{os.getpid()}"
+        with open(tmp, "wb") as f:
+            pickle.dump((engine.store, engine._doc_titles), f)
+        os.replace(tmp, snapshot)
+    return client
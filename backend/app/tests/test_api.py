@@ -1,9 +1,21 @@
+import asyncio
 import time
+import uuid
 
+import pytest
 
-def test_health(client):
+
+async def status_only(response):
+    """Release the response without decoding it, for asserts that only need the status"""
+    await response.aclose()
+    return response.status_code
+
+
+@pytest.mark.structural
+@pytest.mark.asyncio
+async def test_health(client):
     """Test health endpoint works and returns enhanced configuration status"""
-    r = client.get("/api/health")
+    r = await client.get("/api/health")
     assert r.status_code == 200
     data = r.json()
     
@@ -25,9 +37,11 @@ def test_health(client):
     assert data["vector_store"] in ["qdrant", "memory"]
 
 
-def test_metrics_endpoint(client):
+@pytest.mark.structural
+@pytest.mark.asyncio
+async def test_metrics_endpoint(client):
     """Test metrics endpoint has all required fields with correct types"""
-    response = client.get("/api/metrics")
+    response = await client.get("/api/metrics")
     assert response.status_code == 200
     data = response.json()
     
@@ -45,59 +59,70 @@ def test_metrics_endpoint(client):
     assert "vector_store" in data
 
 
-def test_full_workflow(client):
+@pytest.mark.serial
+@pytest.mark.asyncio
+async def test_full_workflow(client):
     """Test complete workflow: ingest documents then ask questions"""
     # Test ingestion
-    ingest_response = client.post("/api/ingest")
+    ingest_response = await client.post("/api/ingest")
     assert ingest_response.status_code == 200
     ingest_data = ingest_response.json()
     assert "indexed_docs" in ingest_data or "docs_processed" in ingest_data
-    # Check that some documents were processed (indexed_docs might be 0 if chunks exist)
-    assert ingest_data.get("indexed_chunks", 0) > 0
+    # Re-ingesting already indexed docs reports 0 new chunks, so check the store itself
+    metrics = (await client.get("/api/metrics")).json()
+    assert metrics["total_chunks"] > 0
     
-    # Test asking a question after ingestion
-    ask_response = client.post("/api/ask", json={"query": "What is the return policy?"})
+    # Test asking questions after ingestion (independent, so sent as one batch)
+    queries = ["What is the return policy?", "How long does delivery take?"]
+    ask_response = await client.post("/api/ask_batch", json={"queries": queries})
     assert ask_response.status_code == 200
-    ask_data = ask_response.json()
-    
-    # Verify response structure
-    assert "answer" in ask_data
-    assert "citations" in ask_data
-    assert "chunks" in ask_data
-    assert isinstance(ask_data["answer"], str)
-    assert isinstance(ask_data["citations"], list)
-    assert isinstance(ask_data["chunks"], list)
-
-
-def test_ask_with_k_parameter(client):
+    ask_batch = ask_response.json()
+    assert [d["query"] for d in ask_batch] == queries
+    for ask_data in ask_batch:
+        # Verify response structure
+        assert "answer" in ask_data
+        assert "citations" in ask_data
+        assert "chunks" in ask_data
+        assert isinstance(ask_data["answer"], str)
+        assert isinstance(ask_data["citations"], list)
+        assert isinstance(ask_data["chunks"], list)
+
+
+@pytest.mark.structural
+@pytest.mark.asyncio
+async def test_ask_with_k_parameter(ingested_client):
     """Test that k parameter correctly limits number of chunks returned"""
-    client.post("/api/ingest")
-    
-    response = client.post("/api/ask", json={"query": "What are shipping costs?", "k": 2})
-    assert response.status_code == 200
-    data = response.json()
-    
-    # Should respect k parameter
-    assert len(data["chunks"]) <= 2
-    assert "answer" in data
-    assert "citations" in data
-
-
-def test_error_handling(client):
+    client = ingested_client
+    responses = await asyncio.gather(
+        *(client.post("/api/ask", json={"query": "What are shipping costs?", "k": k}) for k in (1, 2))
+    )
+    for k, response in zip((1, 2), responses):
+        assert response.status_code == 200
+        data = response.json()
+
+        # Should respect k parameter
+        assert len(data["chunks"]) <= k
+        assert "answer" in data
+        assert "citations" in data
+
+
+@pytest.mark.structural
+@pytest.mark.asyncio
+async def test_error_handling(ingested_client):
     """Test API handles invalid requests properly"""
+    client = ingested_client
     # Missing query field should return validation error
-    response = client.post("/api/ask", json={})
-    assert response.status_code == 422
+    assert await status_only(await client.post("/api/ask", json={})) == 422
     
     # Empty query should be handled gracefully
-    client.post("/api/ingest")
-    response = client.post("/api/ask", json={"query": ""})
-    assert response.status_code in [200, 400, 422]
+    assert await status_only(await client.post("/api/ask", json={"query": ""})) in [200, 400, 422]
 
 
-def test_ask_without_data(client):
+@pytest.mark.structural
+@pytest.mark.asyncio
+async def test_ask_without_data(client):
     """Test asking questions when no documents are loaded"""
-    response = client.post("/api/ask", json={"query": "What is the return policy?"})
+    response = await client.post("/api/ask", json={"query": "What is the return policy?"})
     assert response.status_code == 200
     data = response.json()
     
@@ -107,12 +132,12 @@ def test_ask_without_data(client):
     assert isinstance(data["citations"], list)
 
 
-def test_llm_error_handling_graceful(client):
+@pytest.mark.asyncio
+async def test_llm_error_handling_graceful(ingested_client):
     """Test that LLM errors are handled gracefully without crashing the service"""
-    client.post("/api/ingest")
-    
+    client = ingested_client
     # Even if LLM fails (like our OpenAI quota issue), the API should still work
-    response = client.post("/api/ask", json={"query": "What is the warranty policy?"})
+    response = await client.post("/api/ask", json={"query": "What is the warranty policy?"})
     assert response.status_code == 200
     data = response.json()
     
@@ -129,86 +154,179 @@ def test_llm_error_handling_graceful(client):
     assert isinstance(data["chunks"], list)
 
 
-def test_metrics_update_after_operations(client):
+@pytest.mark.in_process
+@pytest.mark.asyncio
+async def test_metrics_update_after_operations(ingested_client):
     """Test that metrics correctly track operations"""
-    # Get baseline metrics
-    initial_response = client.get("/api/metrics")
-    initial = initial_response.json()
-    
-    # Perform operations
-    client.post("/api/ingest")
-    client.post("/api/ask", json={"query": "test question"})
-    
-    # Check metrics updated
-    final_response = client.get("/api/metrics")
-    final = final_response.json()
-    
-    # Document and chunk counts should increase after ingestion
-    assert final["total_docs"] >= initial["total_docs"]
-    assert final["total_chunks"] >= initial["total_chunks"]
+    from app.main import engine
 
+    client = ingested_client
+    retrievals = len(engine.metrics.t_retrieval)
+    generations = len(engine.metrics.t_generation)
 
-def test_ingest_and_ask(client):
-    """Test original specific question about refund window for small appliances"""
-    r = client.post("/api/ingest")
-    assert r.status_code == 200
-    # Ask a deterministic question
-    r2 = client.post("/api/ask", json={"query":"What is the refund window for small appliances?"})
-    assert r2.status_code == 200
-    data = r2.json()
-    assert "citations" in data and len(data["citations"]) > 0
-    assert "answer" in data and isinstance(data["answer"], str)
+    # Perform operations (unique so the answer caches can't serve it)
+    response = await client.post("/api/ask", json={"query": f"test question {uuid.uuid4().hex}"})
+    assert await status_only(response) == 200
 
+    # One uncached ask adds one retrieval and one generation sample
+    assert len(engine.metrics.t_retrieval) == retrievals + 1
+    assert len(engine.metrics.t_generation) == generations + 1
+    final = (await client.get("/api/metrics")).json()
+    assert final["total_chunks"] > 0
 
-def test_blender_return_question(client):
-    """Test the specific acceptance question about blender returns"""
-    client.post("/api/ingest")
 
-    query = "Can a customer return a damaged blender after 20 days?"
-    response = client.post("/api/ask", json={"query": query})
+ACCEPTANCE_CASES = [
+    ("What is the refund window for small appliances?", "Returns_and_Refunds.md"),
+    ("Can a customer return a damaged blender after 20 days?", "Returns_and_Refunds.md"),
+    ("What's the shipping SLA to East Malaysia for bulky items?", "Delivery_and_Shipping.md"),
+    ("What is the return policy?", None),
+]
+
+
+@pytest.mark.slow
+@pytest.mark.acceptance
+@pytest.mark.real_model
+@pytest.mark.asyncio
+async def test_ask_acceptance(ingested_client):
+    """Test the acceptance questions against the shared ingested corpus in one batch"""
+    queries = [query for query, _ in ACCEPTANCE_CASES]
+    response = await ingested_client.post("/api/ask_batch", json={"queries": queries})
 
     assert response.status_code == 200
-    data = response.json()
+    results = response.json()
+    assert len(results) == len(ACCEPTANCE_CASES)
+
+    for (query, expected_doc), data in zip(ACCEPTANCE_CASES, results):
+        assert data["query"] == query
+        # Check response structure
+        assert "answer" in data and isinstance(data["answer"], str)
+        assert "chunks" in data
+        assert data["citations"], query
+
+        # Check for expected citations
+        if expected_doc:
+            assert any(expected_doc in c["title"] for c in data["citations"]), query
+
+
+@pytest.mark.slow
+@pytest.mark.in_process
+@pytest.mark.asyncio
+async def test_cold_latency(ingested_client):
+    """Test that an uncached question (retrieval + generation) responds within reasonable time limits"""
+    from app.main import engine
+
+    # Unique per run so neither the exact nor the semantic answer cache can serve it
+    query = f"Summarise the warranty, delivery and refund terms for order {uuid.uuid4().hex}"
+    generations = len(engine.metrics.t_generation)
+
+    start_time = time.perf_counter()
+    response = await ingested_client.post("/api/ask", json={"query": query})
+    response_time = time.perf_counter() - start_time
+    
+    assert await status_only(response) == 200
+    assert len(engine.metrics.t_generation) == generations + 1
+    # Should respond within reasonable time (generous for Ollama which is slow)
+    assert response_time < 30.0, f"Response took {response_time:.2f}s, should be < 30s"
 
-    # Check response structure
-    assert "answer" in data
-    assert "citations" in data
-    assert "chunks" in data
-    assert len(data["citations"]) > 0
 
-    # Check for expected citations
-    citation_titles = [c["title"] for c in data["citations"]]
-    assert any("Returns_and_Refunds.md" in title for title in citation_titles)
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_warm_latency(ingested_client):
+    """Test that a repeated question on an ingested corpus is served quickly from cache"""
+    query = {"query": "Which products are covered by the extended warranty?"}
+    await ingested_client.post("/api/ask", json=query)
+
+    start_time = time.perf_counter()
+    response = await ingested_client.post("/api/ask", json=query)
+    response_time = time.perf_counter() - start_time
+
+    assert await status_only(response) == 200
+    assert response_time < 5.0, f"Warm response took {response_time:.2f}s, should be < 5s"
+
+
+@pytest.mark.in_process
+@pytest.mark.asyncio
+async def test_repeated_ask_served_from_cache(ingested_client):
+    """Test that an identical question skips retrieval and generation the second time"""
+    from app.main import engine
+
+    client = ingested_client
+    query = {"query": "How long is the warranty on electronics?", "k": 3}
+    first = (await client.post("/api/ask", json=query)).json()
+    generations = len(engine.metrics.t_generation)
+
+    second = (await client.post("/api/ask", json={**query, "query": "  how long is the warranty on electronics?  "})).json()
+    assert second["answer"] == first["answer"]
+    assert second["citations"] == first["citations"]
+    assert len(engine.metrics.t_generation) == generations
+
+
+@pytest.mark.in_process
+@pytest.mark.asyncio
+async def test_semantic_cache_hit(ingested_client, monkeypatch):
+    """Test that a paraphrase reuses the cached answer only when it retrieves the same evidence"""
+    from app.main import engine
+
+    query = "Can opened electronics be returned for a refund?"
+    first = await ingested_client.post("/api/ask", json={"query": query})
+    assert first.status_code == 200
+    generations = len(engine.metrics.t_generation)
 
+    # Different exact cache key, same meaning and same retrieved chunks -> semantic hit
+    start_time = time.perf_counter()
+    paraphrase = await ingested_client.post("/api/ask", json={"query": "For a refund, can opened electronics be returned?"})
+    response_time = time.perf_counter() - start_time
 
-def test_shipping_sla_question(client):
-    """Test the specific acceptance question about East Malaysia shipping"""
-    client.post("/api/ingest")
+    assert paraphrase.status_code == 200
+    assert paraphrase.json()["answer"] == first.json()["answer"]
+    assert len(engine.metrics.t_generation) == generations
+    assert response_time < 0.05, f"Cached response took {response_time * 1000:.1f}ms, should be < 50ms"
 
-    query = "What's the shipping SLA to East Malaysia for bulky items?"
-    response = client.post("/api/ask", json={"query": query})
+    # Same meaning but different evidence retrieved -> must generate again
+    unrelated = await engine.store.search_async(
+        engine.embedder.embed("What's the shipping SLA to East Malaysia for bulky items?"), 4
+    )
+    original_search = engine.store.search_async
 
+    async def search_other_chunks(query_vec, k=4):
+        await original_search(query_vec, k)
+        return unrelated[:k]
+
+    monkeypatch.setattr(engine.store, "search_async", search_other_chunks)
+    response = await ingested_client.post("/api/ask", json={"query": "Can opened electronics be returned, for a refund?"})
     assert response.status_code == 200
-    data = response.json()
+    assert len(engine.metrics.t_generation) == generations + 1
 
-    citation_titles = [c["title"] for c in data["citations"]]
-    assert any("Delivery_and_Shipping.md" in title for title in citation_titles)
 
-    # Check that answer contains key information (when using proper LLM)
-    answer_lower = data["answer"].lower()
-    # Note: These might not work with Ollama but should work with OpenAI
-    # assert any(term in answer_lower for term in ["7-10", "bulky", "surcharge"])
+@pytest.mark.in_process
+@pytest.mark.asyncio
+async def test_ask_batch_records_retrieval_latency(ingested_client, monkeypatch):
+    """Test that the batched embed + search time is recorded once per query"""
+    from app.main import engine
 
+    search_batch = engine.store.search_batch
+
+    def slow_search_batch(queries, k=4):
+        time.sleep(0.05)
+        return search_batch(queries, k)
+
+    monkeypatch.setattr(engine.store, "search_batch", slow_search_batch)
+    queries = [f"Which {item} accessories ship separately? {uuid.uuid4().hex}" for item in ("blender", "kettle", "toaster")]
+    before = len(engine.metrics.t_retrieval)
+
+    response = await ingested_client.post("/api/ask_batch", json={"queries": queries})
 
-def test_reasonable_performance(client):
-    """Test that API responds within reasonable time limits"""
-    client.post("/api/ingest")
-    
-    start_time = time.time()
-    response = client.post("/api/ask", json={"query": "What is the return policy?"})
-    end_time = time.time()
-    
     assert response.status_code == 200
-    # Should respond within reasonable time (generous for Ollama which is slow)
-    response_time = end_time - start_time
-    assert response_time < 30.0, f"Response took {response_time:.2f}s, should be < 30s"
+    recorded = engine.metrics.t_retrieval[before:]
+    assert len(recorded) == len(queries)
+    assert all(ms >= 50.0 for ms in recorded)
+
+
+@pytest.mark.structural
+@pytest.mark.asyncio
+async def test_ask_batch_rejects_oversized_batch(ingested_client):
+    """Test that /api/ask_batch caps the number of queries per request"""
+    from app.models import MAX_BATCH_QUERIES
+
+    queries = ["What is the return policy?"] * (MAX_BATCH_QUERIES + 1)
+    assert await status_only(await ingested_client.post("/api/ask_batch", json={"queries": queries})) == 422
@@ -0,0 +1,145 @@
+import asyncio
+import re
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from app.rag import EmbeddingCache, InMemoryStore, QdrantStore, SemanticAnswerCache, SemanticEmbedder, _token_hashes
+
+
+def test_semantic_cache_requires_evidence_overlap():
+    """Test that a near-duplicate query only reuses an answer backed by the same chunks"""
+    cache = SemanticAnswerCache(dim=4)
+    q = np.array([1.0, 0.0, 0.0, 0.0], dtype=np.float32)
+    paraphrase = np.array([0.99, 0.05, 0.0, 0.0], dtype=np.float32)
+    scope = (4, "stub", 1)
+    cache.add(q, {"a", "b", "c", "d"}, scope, "cached answer")
+
+    assert cache.lookup(paraphrase, {"a", "b", "c", "d"}, scope) == "cached answer"
+    assert cache.lookup(paraphrase, {"a", "x", "y", "z"}, scope) is None
+    assert cache.lookup(paraphrase, {"a", "b", "c", "d"}, (4, "stub", 2)) is None
+    assert cache.lookup(np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32), {"a", "b", "c", "d"}, scope) is None
+
+
+def test_in_memory_search_returns_sorted_top_k():
+    """Test that partial top-k selection matches a full sort"""
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 8)).astype(np.float32)
+    store = InMemoryStore(dim=8, capacity=4)
+    store.upsert(list(vectors), [{"hash": str(i), "i": i} for i in range(50)])
+    query = rng.standard_normal(8).astype(np.float32)
+
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = list(np.argsort(-(normed @ query))[:5])
+    results = store.search(query, k=5)
+    assert [m["i"] for _, m in results] == expected
+    assert [s for s, _ in results] == sorted((s for s, _ in results), reverse=True)
+    assert len(store.search(query, k=100)) == 50
+
+    empty = InMemoryStore(dim=8, capacity=0)
+    empty.upsert(list(vectors[:3]), [{"hash": str(i), "i": i} for i in range(3)])
+    assert empty.count() == 3
+
+
+def test_in_memory_search_batch_matches_search():
+    """Test that batched search returns the same hits as one search per query"""
+    rng = np.random.default_rng(1)
+    store = InMemoryStore(dim=8, capacity=2)
+    store.upsert(list(rng.standard_normal((20, 8)).astype(np.float32)), [{"id": i} for i in range(20)])
+    queries = rng.standard_normal((3, 8)).astype(np.float32)
+
+    for k in (1, 5, 50):
+        batched = store.search_batch(queries, k=k)
+        for q, hits in zip(queries, batched):
+            single = store.search(q, k=k)
+            assert [m["id"] for _, m in hits] == [m["id"] for _, m in single]
+            assert np.allclose([s for s, _ in hits], [s for s, _ in single], atol=1e-5)
+
+
+def test_embedding_cache_is_keyed_by_model(tmp_path):
+    """Test cache hits/misses and that a different model neither sees nor erases entries"""
+    path = str(tmp_path / "embeddings.db")
+    prod = EmbeddingCache(path, model="all-MiniLM-L6-v2", dim=4)
+    vecs = np.arange(8, dtype=np.float32).reshape(2, 4)
+    prod.put_many(["a", "b"], vecs)
+
+    hits = prod.get_many(["a", "b", "missing"])
+    assert set(hits) == {"a", "b"}
+    assert np.array_equal(hits["b"], vecs[1])
+
+    # Another embedder opening the same file gets misses and leaves the rows alone
+    fake = EmbeddingCache(path, model="hash-fallback", dim=4)
+    assert fake.get_many(["a", "b"]) == {}
+    fake.put_many(["a"], np.ones((1, 4), dtype=np.float32))
+    assert EmbeddingCache(path, model="hash-fallback", dim=8).get_many(["a"]) == {}
+
+    reopened = EmbeddingCache(path, model="all-MiniLM-L6-v2", dim=4)
+    assert set(reopened.get_many(["a", "b"])) == {"a", "b"}
+    assert np.array_equal(reopened.get_many(["a"])["a"], vecs[0])
+
+
+@pytest.mark.asyncio
+async def test_qdrant_search_batcher_batches_fans_out_errors_and_restarts():
+    """Test Qdrant micro-batching against a fake client: batching, error fan-out and restart"""
+    class FakeClient:
+        def __init__(self):
+            self.calls = []
+            self.fail = None
+
+        def search_batch(self, collection_name, requests):
+            self.calls.append(len(requests))
+            if self.fail == "error":
+                raise ConnectionError("qdrant down")
+            responses = [[SimpleNamespace(score=r.vector[0], payload={"q": r.vector[0]})] for r in requests]
+            return responses[:-1] if self.fail == "short" else responses
+
+    store = object.__new__(QdrantStore)
+    store.client, store.collection = FakeClient(), "test"
+    store._search_loop = store._search_queue = store._search_task = None
+
+    def search_all(n):
+        queries = [np.full(4, float(i), dtype=np.float32) for i in range(n)]
+        return asyncio.wait_for(
+            asyncio.gather(*(store.search_async(q, 1) for q in queries), return_exceptions=True), 2.0
+        )
+
+    # Concurrent searches share one search_batch call and get their own results
+    results = await search_all(3)
+    assert store.client.calls == [3]
+    assert [r[0][1]["q"] for r in results] == [0.0, 1.0, 2.0]
+
+    # A failing or short response fails every caller in the batch instead of hanging
+    for mode, error in (("error", ConnectionError), ("short", RuntimeError)):
+        store.client.fail = mode
+        assert all(isinstance(r, error) for r in await search_all(3))
+    store.client.fail = None
+
+    # A batcher that has died is restarted on the next search
+    waiting = asyncio.ensure_future(store.search_async(np.ones(4, dtype=np.float32), 1))
+    await asyncio.sleep(0)
+    store._search_task.cancel()
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(waiting, 2.0)
+    assert store._search_task.done()
+    assert (await search_all(2))[1][0][1]["q"] == 1.0
+
+    store._search_task.cancel()
+    await asyncio.gather(store._search_task, return_exceptions=True)
+
+
+def test_fallback_embedder_is_a_bag_of_regex_words():
+    """Test the vectorized fallback tokenizes like \\w+ and embeds the same in or out of a batch"""
+    texts = ["Refunds within 30 days — 7–10 days for East Malaysia.", "", "naïve İstanbul _x_ ５０", "days 30 within refunds", "refund 😀 policy", "a😀b 𝐀𝐁 𐐀x"]
+    hashes, owners = _token_hashes(texts)
+    assert np.bincount(owners, minlength=len(texts)).tolist() == [len(re.findall(r"\w+", t.lower())) for t in texts]
+    # Non-BMP letters are word characters, emoji are separators
+    assert np.array_equal(_token_hashes(["a😀b"])[0], _token_hashes(["a b"])[0])
+
+    embedder = SemanticEmbedder(load_model=False)
+    batch = embedder._fallback_embed_batch(texts)
+    single = np.vstack([embedder._fallback_embed_batch([t]) for t in texts])
+    assert np.array_equal(batch, single)
+    assert not batch[1].any()
+    # Order-free bag of words: same tokens, same vector
+    assert np.allclose(embedder._fallback_embed_batch(["refunds within 30 days"])[0], batch[3])